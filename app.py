@@ -3,8 +3,9 @@
 # ----------------------------------------------------------------------------#
 
 import logging
-import sys
 from datetime import datetime
+from functools import lru_cache
+from itertools import groupby
 from logging import Formatter, FileHandler
 
 import dateutil.parser
@@ -13,7 +14,8 @@ from dotenv import load_dotenv
 from flask import Flask, render_template, request, flash, redirect, url_for
 from flask_migrate import Migrate
 from flask_moment import Moment
-from sqlalchemy import or_
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import func, or_
 from sqlalchemy.exc import SQLAlchemyError
 
 from models import setup_db, Venue, Artist, Show
@@ -31,26 +33,60 @@ app.config.from_object('config')
 db = setup_db(app)
 migrate = Migrate(app, db)
 
+# most past or upcoming shows listed on a venue or artist page
+SHOWS_PER_SECTION = 50
+# keep compiled templates on disk so new processes skip compiling them,
+# auto reload already follows debug so it's off in production
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
 
 # ----------------------------------------------------------------------------#
 # Filters.
 # ----------------------------------------------------------------------------#
 
+# parsed once here instead of on every call of the filter
+DATETIME_PATTERNS = {
+    'full': dates.parse_pattern("EEEE MMMM, d, y 'at' h:mma"),
+    'medium': dates.parse_pattern("EE MM, dd, y h:mma"),
+}
+
+
+@lru_cache(maxsize=4096)
+def parse_datetime(value):
+    # pages tend to repeat the same timestamps, dateutil is slow to parse
+    return dateutil.parser.parse(value)
+
+
 def format_datetime(value, format_name='medium'):
     date = value
     if type(value) is not datetime:
-        date = dateutil.parser.parse(value)
-    datetime_format = "EE MM, dd, y h:mma"
-    if format_name == 'full':
-        datetime_format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format_name == 'medium':
-        datetime_format = "EE MM, dd, y h:mma"
-    return dates.format_datetime(date, datetime_format)
+        date = parse_datetime(value)
+    pattern = DATETIME_PATTERNS.get(format_name, DATETIME_PATTERNS['medium'])
+    return pattern.apply(date, dates.LC_TIME)
 
 
 app.jinja_env.filters['datetime'] = format_datetime
 
 
+# ----------------------------------------------------------------------------#
+# Helpers.
+# ----------------------------------------------------------------------------#
+
+def shows_query():
+    """
+        shows joined with their artist and venue, as flat rows of
+        only the columns the shows templates render
+    """
+    return db.session.query(
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Show.start_time
+    ).select_from(Show).join(Artist).join(Venue)
+
+
 # ----------------------------------------------------------------------------#
 # Controllers.
 # ----------------------------------------------------------------------------#
@@ -65,29 +101,32 @@ def index():
 
 @app.route('/venues')
 def venues():
-    data = []
-    areas = db.session.query(Venue.state, Venue.city).distinct()
-    for state, city in areas:
-        # I didn't change key name of upcoming_shows_count
-        # to num_upcoming_shows as it's not used and
-        # if it was used I'll change it from the front-end side
-        data.append({
-            "city": city,
-            "state": state,
-            "venues": Venue.query.filter(Venue.state == state,
-                                         Venue.city == city)
-        })
+    # one query ordered by area, then grouped here instead of
+    # re-querying the venues of every (state, city) pair,
+    # and only the columns the template renders
+    all_venues = db.session.query(
+        Venue.state, Venue.city, Venue.id, Venue.name
+    ).order_by(Venue.state, Venue.city).all()
+    data = [{
+        "city": city,
+        "state": state,
+        "venues": list(area_venues)
+    } for (state, city), area_venues in groupby(
+        all_venues, key=lambda v: (v.state, v.city))]
     return render_template('pages/venues.html', areas=data)
 
 
 @app.route('/venues/search', methods=['POST'])
 def search_venues():
     q = request.form.get('search_term', '')
-    venues_query = Venue.query.filter(Venue.name.ilike(f'%{q}%'))
+    # the template only renders id and name
+    venues_query = db.session.query(Venue.id, Venue.name).filter(
+        Venue.name.ilike(f'%{q}%'))
 
+    results = venues_query.all()
     response = {
-        "count": venues_query.count(),
-        "data": venues_query
+        "count": len(results),
+        "data": results
     }
     return render_template('pages/search_venues.html', results=response,
                            search_term=q)
@@ -96,19 +135,23 @@ def search_venues():
 @app.route('/venues/<int:venue_id>')
 def show_venue(venue_id):
     venue: Venue = Venue.query.get_or_404(venue_id)
-    past_shows = db.session.query(Artist, Show).join(Show).join(Venue). \
-        filter(
-        Show.venue_id == venue_id,
-        Show.artist_id == Artist.id,
-        Show.start_time < datetime.now()
-    )
-
-    upcoming_shows = db.session.query(Artist, Show).join(Show).join(Venue). \
-        filter(
-        Show.venue_id == venue_id,
-        Show.artist_id == Artist.id,
-        Show.start_time >= datetime.now()
-    )
+    now = datetime.now()
+    venue_shows = db.session.query(
+        Artist.id.label('artist_id'),
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Show.start_time
+    ).select_from(Show).join(Artist, Show.artist_id == Artist.id).filter(
+        Show.venue_id == venue_id)
+    # only a page of each is rendered, the counts cover all of them
+    past_shows = venue_shows.filter(Show.start_time < now).order_by(
+        Show.start_time.desc()).limit(SHOWS_PER_SECTION).all()
+    upcoming_shows = venue_shows.filter(Show.start_time >= now).order_by(
+        Show.start_time).limit(SHOWS_PER_SECTION).all()
+    past_shows_count, upcoming_shows_count = venue_shows.with_entities(
+        func.count().filter(Show.start_time < now),
+        func.count().filter(Show.start_time >= now)
+    ).one()
 
     data = {
         "id": venue.id,
@@ -123,20 +166,10 @@ def show_venue(venue_id):
         "seeking_talent": venue.seeking_talent,
         "seeking_description": venue.seeking_description,
         "image_link": venue.image_link,
-        "past_shows": [{
-            'artist_id': artist.id,
-            "artist_name": artist.name,
-            "artist_image_link": artist.image_link,
-            "start_time": show.start_time
-        } for artist, show in past_shows.all()],
-        "past_shows_count": past_shows.count(),
-        "upcoming_shows": [{
-            'artist_id': artist.id,
-            "artist_name": artist.name,
-            "artist_image_link": artist.image_link,
-            "start_time": show.start_time
-        } for artist, show in upcoming_shows.all()],
-        "upcoming_shows_count": upcoming_shows.count(),
+        "past_shows": past_shows,
+        "past_shows_count": past_shows_count,
+        "upcoming_shows": upcoming_shows,
+        "upcoming_shows_count": upcoming_shows_count,
     }
 
     return render_template('pages/show_venue.html', venue=data)
@@ -155,15 +188,14 @@ def create_venue():
             db.session.add(venue)
             db.session.commit()
         except SQLAlchemyError:
-            print(sys.exc_info())
+            app.logger.exception("Database error in %s", request.endpoint)
             db.session.rollback()
             db.session.close()
-            flash(
-                'An error occurred. Venue '
-                + form.name.data + ' could not be listed.')
+            flash(f'An error occurred. Venue {form.name.data} '
+                  'could not be listed.')
             return render_template('forms/new_venue.html', form=form)
 
-        flash('Venue ' + venue.name + ' was successfully listed!')
+        flash(f'Venue {venue.name} was successfully listed!')
         return redirect(url_for('show_venue', venue_id=venue.id))
     return render_template('forms/new_venue.html', form=form)
 
@@ -190,35 +222,33 @@ def edit_venue(venue_id):
         form.populate_obj(venue)
 
         try:
-            db.session.add(venue)
             db.session.commit()
         except SQLAlchemyError:
-            print(sys.exc_info())
+            app.logger.exception("Database error in %s", request.endpoint)
             db.session.rollback()
             db.session.close()
-            flash(
-                'An error occurred. Venue '
-                + venue_name + ' could not be edited.')
+            flash(f'An error occurred. Venue {venue_name} '
+                  'could not be edited.')
             return render_template('forms/edit_venue.html', form=form,
                                    venue_name=venue_name)
 
-        flash('Venue ' + venue.name + ' was successfully updated!')
+        flash(f'Venue {venue.name} was successfully updated!')
         return redirect(url_for('show_venue', venue_id=venue_id))
 
     return render_template('forms/edit_venue.html', form=form,
                            venue_name=venue_name)
 
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@app.route('/venues/<int:venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
     v = Venue.query.get_or_404(venue_id)
     try:
         db.session.delete(v)
         db.session.commit()
     except SQLAlchemyError:
-        print(sys.exc_info())
+        app.logger.exception("Database error in %s", request.endpoint)
         db.session.rollback()
-        flash('An error occurred. Venue ' + v.name + ' could not be deleted.')
+        flash(f'An error occurred. Venue {v.name} could not be deleted.')
         return '', 500
     finally:
         db.session.close()
@@ -241,14 +271,17 @@ def artists():
 @app.route('/artists/search', methods=['POST'])
 def search_artists():
     q = request.form.get('search_term', '')
-    artists_query = Artist.query.filter(Artist.name.ilike(f'%{q}%'))
+    # the template only renders id and name
+    artists_query = db.session.query(Artist.id, Artist.name).filter(
+        Artist.name.ilike(f'%{q}%'))
 
     # I didn't loop throw venues and change upcoming_shows_count
     # because it will take resources for no reason
     # so I would simply change it from the front-end size if it was used
+    results = artists_query.all()
     response = {
-        "count": artists_query.count(),
-        "data": artists_query
+        "count": len(results),
+        "data": results
     }
     return render_template('pages/search_artists.html', results=response,
                            search_term=q)
@@ -257,20 +290,23 @@ def search_artists():
 @app.route('/artists/<int:artist_id>')
 def show_artist(artist_id):
     artist: Artist = Artist.query.get_or_404(artist_id)
-    past_shows = db.session.query(
-        Venue, Show
-    ).join(Show).join(Artist).filter(
-        Show.venue_id == artist_id,
-        Show.artist_id == Artist.id,
-        Show.start_time < datetime.now()
-    )
-    upcoming_shows = db.session.query(
-        Venue, Show
-    ).join(Show).join(Artist).filter(
-        Show.venue_id == artist_id,
-        Show.artist_id == Artist.id,
-        Show.start_time >= datetime.now()
-    )
+    now = datetime.now()
+    artist_shows = db.session.query(
+        Venue.id.label('venue_id'),
+        Venue.name.label('venue_name'),
+        Venue.image_link.label('venue_image_link'),
+        Show.start_time
+    ).select_from(Show).join(Venue, Show.venue_id == Venue.id).filter(
+        Show.artist_id == artist_id)
+    # only a page of each is rendered, the counts cover all of them
+    past_shows = artist_shows.filter(Show.start_time < now).order_by(
+        Show.start_time.desc()).limit(SHOWS_PER_SECTION).all()
+    upcoming_shows = artist_shows.filter(Show.start_time >= now).order_by(
+        Show.start_time).limit(SHOWS_PER_SECTION).all()
+    past_shows_count, upcoming_shows_count = artist_shows.with_entities(
+        func.count().filter(Show.start_time < now),
+        func.count().filter(Show.start_time >= now)
+    ).one()
 
     data = {
         "id": artist.id,
@@ -284,20 +320,10 @@ def show_artist(artist_id):
         "seeking_venue": artist.seeking_venue,
         "seeking_description": artist.seeking_description,
         "image_link": artist.image_link,
-        "past_shows": [{
-            'artist_id': venue.id,
-            "artist_name": venue.name,
-            "artist_image_link": venue.image_link,
-            "start_time": show.start_time
-        } for venue, show in past_shows.all()],
-        "past_shows_count": past_shows.count(),
-        "upcoming_shows": [{
-            'artist_id': venue.id,
-            "artist_name": venue.name,
-            "artist_image_link": venue.image_link,
-            "start_time": show.start_time
-        } for venue, show in upcoming_shows.all()],
-        "upcoming_shows_count": upcoming_shows.count(),
+        "past_shows": past_shows,
+        "past_shows_count": past_shows_count,
+        "upcoming_shows": upcoming_shows,
+        "upcoming_shows_count": upcoming_shows_count,
     }
 
     return render_template('pages/show_artist.html', artist=data)
@@ -316,15 +342,14 @@ def create_artist():
             db.session.add(artist)
             db.session.commit()
         except SQLAlchemyError:
-            flash(
-                'An error occurred. Artist '
-                + form.name.data + ' could not be listed.')
-            print(sys.exc_info())
+            flash(f'An error occurred. Artist {form.name.data} '
+                  'could not be listed.')
+            app.logger.exception("Database error in %s", request.endpoint)
             db.session.rollback()
             db.session.close()
             return render_template('forms/new_artist.html', form=form)
 
-        flash('Artist ' + artist.name + ' was successfully listed!')
+        flash(f'Artist {artist.name} was successfully listed!')
         return redirect(url_for('show_artist', artist_id=artist.id))
     return render_template('forms/new_artist.html', form=form)
 
@@ -339,14 +364,11 @@ def edit_artist(artist_id):
     if form.validate_on_submit():
         form.populate_obj(artist)
         try:
-            db.session.add(artist)
             db.session.commit()
         except SQLAlchemyError:
-            flash(
-                'An error occurred. Artist '
-                + artist_name + ' could not be edited.'
-            )
-            print(sys.exc_info())
+            flash(f'An error occurred. Artist {artist_name} '
+                  'could not be edited.')
+            app.logger.exception("Database error in %s", request.endpoint)
             db.session.rollback()
             db.session.close()
             return render_template('forms/edit_artist.html', form=form,
@@ -357,16 +379,16 @@ def edit_artist(artist_id):
                            artist_name=artist_name)
 
 
-@app.route('/artists/<artist_id>', methods=['DELETE'])
+@app.route('/artists/<int:artist_id>', methods=['DELETE'])
 def delete_artist(artist_id):
     a = Artist.query.get_or_404(artist_id)
     try:
         db.session.delete(a)
         db.session.commit()
     except SQLAlchemyError:
-        print(sys.exc_info())
+        app.logger.exception("Database error in %s", request.endpoint)
         db.session.rollback()
-        flash('An error occurred. Artist ' + a.name + ' could not be deleted.')
+        flash(f'An error occurred. Artist {a.name} could not be deleted.')
         db.session.close()
         return '', 500
     return '', 204
@@ -377,7 +399,7 @@ def delete_artist(artist_id):
 
 @app.route('/shows')
 def shows():
-    data = db.session.query(Show).join(Artist).join(Venue)
+    data = shows_query().all()
     return render_template('pages/shows.html', shows=data)
 
 
@@ -393,7 +415,7 @@ def create_show():
             db.session.add(show)
             db.session.commit()
         except SQLAlchemyError:
-            print(sys.exc_info())
+            app.logger.exception("Database error in %s", request.endpoint)
             db.session.rollback()
             db.session.close()
             flash('An error occurred. Show could not be listed.')
@@ -410,14 +432,13 @@ def search_shows():
     search_term = request.form.get('search_term', '')
     q = f"%{search_term}%"
 
-    shows_query = db.session.query(Show).join(Artist).join(Venue).filter(or_(
+    results = shows_query().filter(or_(
         Venue.name.ilike(q),
         Artist.name.ilike(q)
-    ))
-
+    )).all()
     response = {
-        "count": shows_query.count(),
-        "data": shows_query
+        "count": len(results),
+        "data": results
     }
     return render_template('pages/search_shows.html', results=response,
                            search_term=search_term)
@@ -15,3 +15,13 @@ SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URI') or 'sqlite:///:memory:'  # d
 
 # To suppress FSADeprecationWarning warning
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Connection pool for concurrent requests, sqlite in memory has no pool
+# to size so it keeps SQLAlchemy's defaults
+if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 20,
+        'max_overflow': 10,
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+    }
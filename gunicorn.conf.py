@@ -0,0 +1,23 @@
+# ----------------------------------------------------------------------------#
+# Gunicorn settings, see https://docs.gunicorn.org/en/stable/settings.html
+# ----------------------------------------------------------------------------#
+
+from gevent import monkey
+
+# preloading imports the app in the master before gevent workers get
+# the chance to patch, so patch here first (this file is read before)
+monkey.patch_all()
+
+import multiprocessing  # noqa: E402
+import os  # noqa: E402
+
+bind = os.getenv('BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# every view waits on the database most of the time, so each worker
+# serves many requests at once as greenlets instead of blocking on one
+# (psycopg2 is patched to cooperate with gevent in wsgi.py)
+worker_class = 'gevent'
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', 1000))
+# import the app once in the master and fork the workers from it so they
+# share its memory, no database connection is opened while importing
+preload_app = True
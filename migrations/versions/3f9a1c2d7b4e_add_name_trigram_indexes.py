@@ -0,0 +1,40 @@
+"""Add trigram indexes on venue and artist names
+
+Revision ID: 3f9a1c2d7b4e
+Revises: 17bb51fcd27c
+Create Date: 2026-10-15 10:12:31.482913
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2d7b4e'
+down_revision = '17bb51fcd27c'
+branch_labels = None
+depends_on = None
+
+
+# noinspection SqlNoDataSourceInspection,SqlResolve
+def upgrade():
+    # searching uses ILIKE '%term%' which a btree index can't serve,
+    # pg_trgm's gin index can, other databases just keep scanning
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'venue_name_trgm_idx', 'venues', ['name'],
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'artist_name_trgm_idx', 'artists', ['name'],
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'}
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('artist_name_trgm_idx', table_name='artists')
+    op.drop_index('venue_name_trgm_idx', table_name='venues')
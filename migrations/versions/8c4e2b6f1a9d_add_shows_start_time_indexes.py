@@ -0,0 +1,27 @@
+"""Add composite start time indexes on shows
+
+Revision ID: 8c4e2b6f1a9d
+Revises: 3f9a1c2d7b4e
+Create Date: 2026-10-15 11:04:52.917364
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '8c4e2b6f1a9d'
+down_revision = '3f9a1c2d7b4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # venue and artist pages filter on the owner id and a start_time range
+    op.create_index('ix_shows_venue_start', 'shows',
+                    ['venue_id', 'start_time'])
+    op.create_index('ix_shows_artist_start', 'shows',
+                    ['artist_id', 'start_time'])
+
+
+def downgrade():
+    op.drop_index('ix_shows_artist_start', table_name='shows')
+    op.drop_index('ix_shows_venue_start', table_name='shows')
@@ -15,6 +15,11 @@ def setup_db(app):
 class Show(db.Model):
     query: BaseQuery
     __tablename__ = 'shows'
+    # venue and artist pages filter on the owner id and a start_time range
+    __table_args__ = (
+        db.Index('ix_shows_venue_start', 'venue_id', 'start_time'),
+        db.Index('ix_shows_artist_start', 'artist_id', 'start_time'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     artist_id = db.Column(db.Integer,
                           db.ForeignKey('artists.id', ondelete='CASCADE'))
@@ -147,6 +152,11 @@ class Venue(db.Model, HybridShowsMixin, HybridGenresMixin):
     __tablename__ = 'venues'
     # it's only used to get id its from the URI combined with _id
     __model_name__ = 'venue'
+    # serves the ILIKE '%term%' searches, see the trigram index migration
+    __table_args__ = (
+        db.Index('venue_name_trgm_idx', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
@@ -182,6 +192,11 @@ class Artist(db.Model, HybridShowsMixin, HybridGenresMixin):
     __tablename__ = 'artists'
     # it's only used to get id its from the URI combined with _id
     __model_name__ = 'artist'
+    # serves the ILIKE '%term%' searches, see the trigram index migration
+    __table_args__ = (
+        db.Index('artist_name_trgm_idx', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
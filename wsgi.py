@@ -0,0 +1,15 @@
+# ----------------------------------------------------------------------------#
+# Production entry point, run it with
+#   gunicorn -c gunicorn.conf.py wsgi:app
+# ----------------------------------------------------------------------------#
+
+from psycogreen.gevent import patch_psycopg
+
+# make psycopg2 yield to other greenlets while it waits on postgres,
+# it must be done before the app creates any connection
+patch_psycopg()
+
+from app import app  # noqa: E402
+
+if __name__ == '__main__':
+    app.run()